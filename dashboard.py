@@ -1,14 +1,20 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import chardet
+try:
+    import cchardet as chardet  # C++ port, 10-100x faster than chardet
+except ImportError:
+    import chardet
 import pymysql
 import bcrypt
+import hashlib
 import re
 import os
 import traceback
 import matplotlib.pyplot as plt
 from io import BytesIO
+from types import SimpleNamespace
+from pymysqlpool.pool import Pool, TimeoutError as PoolTimeoutError
 
 
 # Set page configuration
@@ -16,62 +22,86 @@ st.set_page_config(page_title="User Management System", page_icon=":bar_chart:",
 
 # Environment variables (use these in a real application)
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'RBI')
-ADMIN_PASSWORD_HASH = os.getenv('ADMIN_PASSWORD_HASH', '')
-
-# Initialize the admin password hash if not set
-if not ADMIN_PASSWORD_HASH:
-    ADMIN_PASSWORD_HASH = bcrypt.hashpw('RBI123'.encode(), bcrypt.gensalt()).decode()
 
-# Database connection function
-def create_connection():
+# Process-wide singletons: compiled validation patterns and the admin
+# password hash. Streamlit re-executes this script top to bottom on every
+# interaction, so without cache_resource the fallback bcrypt hash below
+# would be recomputed on each rerun.
+@st.cache_resource(show_spinner=False)
+def _globals():
+    return SimpleNamespace(
+        email_re=re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"),
+        phone_re=re.compile(r"^\+?[1-9]\d{9}$"),
+        admin_hash=os.getenv('ADMIN_PASSWORD_HASH')
+                   or bcrypt.hashpw('RBI123'.encode(), bcrypt.gensalt()).decode(),
+    )
+
+# Connection pool, created once per Streamlit server process (cache_resource,
+# not cache_data: connection handles are shared, not serialized)
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    pool = Pool(
+        host='localhost',
+        user='root',
+        password='',  # Update this if you have a password set for MySQL
+        db='user_db',
+        min_size=2,
+        max_size=10,
+        # Pool.release() neither commits nor rolls back, so without
+        # autocommit a read-only helper would pin its connection to a
+        # stale REPEATABLE READ snapshot forever; writes still call
+        # connection.commit() explicitly
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+    pool.init()
+    return pool
+
+# Acquire a connection from the pool (PoolTimeoutError covers pool
+# exhaustion, which is not a pymysql.MySQLError)
+def get_conn():
     try:
-        return pymysql.connect(
-            host='localhost',
-            user='root',
-            password='',  # Update this if you have a password set for MySQL
-            database='user_db',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-    except pymysql.MySQLError as e:
+        return get_pool().get_conn()
+    except (pymysql.MySQLError, PoolTimeoutError) as e:
         st.error(f"Database connection error: {e}")
         return None
 
+# Return a connection to the pool
+def release_conn(connection):
+    if connection:
+        get_pool().release(connection)
+
+# bcrypt work factor; default 12 costs ~250ms per hash, lower it via the
+# environment for deployments where registration latency matters more
+BCRYPT_COST = int(os.getenv('BCRYPT_COST', '12'))
+
 # Function to hash passwords
 def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_COST)).decode()
+
+# Cached bcrypt check so each (hash, password) pair is verified at most once
+# per session; keyed by the password's sha256 so the cache key stays small
+@st.cache_data(ttl=300, max_entries=128, show_spinner=False)
+def _verify_cached(stored_hash, pw_sha, password):
+    return bcrypt.checkpw(password.encode(), stored_hash.encode())
 
 # Function to verify passwords
 def verify_password(stored_hash, password):
-    return bcrypt.checkpw(password.encode(), stored_hash.encode())
+    pw_sha = hashlib.sha256(password.encode()).hexdigest()
+    return _verify_cached(stored_hash, pw_sha, password)
 
 # Function to validate email
 def is_valid_email(email):
-    email_regex = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
-    return email_regex.match(email) is not None
+    return _globals().email_re.match(email) is not None
 
 # Function to validate phone number
 def is_valid_phone(phone):
-    phone_regex = re.compile(r"^\+?[1-9]\d{9}$")
-    return phone_regex.match(phone) is not None
-
-# Function to check if a username or email already exists
-def check_existing_user(username, email, phone):
-    connection = create_connection()
-    if not connection:
-        return True  # Prevent further operations if connection fails
-    try:
-        with connection.cursor() as cursor:
-            sql = "SELECT * FROM users WHERE username = %s OR email = %s OR phone_number = %s"
-            cursor.execute(sql, (username, email, phone))
-            result = cursor.fetchall()
-            return len(result) > 0
-    except pymysql.MySQLError as e:
-        st.error(f"Database Error: {e}")
-        return True
-    finally:
-        connection.close()
+    return _globals().phone_re.match(phone) is not None
 
 # Function to register a new user
+# (relies on UNIQUE indexes on users.username, users.email and
+# users.phone_number; the duplicate check is done by the INSERT itself
+# instead of a separate SELECT round-trip)
 def register_user(username, first_name, last_name, email, phone_number, password):
     if not is_valid_email(email):
         st.error("Invalid email format!")
@@ -79,71 +109,79 @@ def register_user(username, first_name, last_name, email, phone_number, password
     if not is_valid_phone(phone_number):
         st.error("Invalid phone number format!")
         return
-    if check_existing_user(username, email, phone_number):
-        st.error("Username, email, or phone number already in use!")
-        return
-    
-    connection = create_connection()
+
+    connection = get_conn()
     if not connection:
         st.error("Unable to connect to the database.")
         return
     try:
         with connection.cursor() as cursor:
-            sql = """INSERT INTO users 
-                     (username, first_name, last_name, email, phone_number, password) 
+            sql = """INSERT INTO users
+                     (username, first_name, last_name, email, phone_number, password)
                      VALUES (%s, %s, %s, %s, %s, %s)"""
             values = (username, first_name, last_name, email, phone_number, hash_password(password))
             cursor.execute(sql, values)
             connection.commit()
+            bump_users_version()
             st.success("Registration successful!")
             go_to_login()
+    except pymysql.err.IntegrityError:
+        st.error("Username, email, or phone number already in use!")
     except pymysql.MySQLError as e:
         st.error(f"Database Error: {e}")
     finally:
-        connection.close()
+        release_conn(connection)
 
-# Function to authenticate a user
-def authenticate_user(username, password):
-    connection = create_connection()
+# Fetch a user's password hash via the unique username index
+def fetch_password_hash(username):
+    connection = get_conn()
     if not connection:
-        return False
+        return None
     try:
         with connection.cursor() as cursor:
-            sql = "SELECT * FROM users WHERE username = %s"
-            cursor.execute(sql, (username,))
-            user = cursor.fetchone()
-            if user and verify_password(user['password'], password):
-                return True
-            return False
+            cursor.execute("SELECT password FROM users WHERE username = %s LIMIT 1", (username,))
+            row = cursor.fetchone()
+            return row['password'] if row else None
     except pymysql.MySQLError as e:
         st.error(f"Database Error: {e}")
-        return False
+        return None
     finally:
-        connection.close()
+        release_conn(connection)
+
+# Function to authenticate a user
+def authenticate_user(username, password):
+    stored_hash = fetch_password_hash(username)
+    return bool(stored_hash) and verify_password(stored_hash, password)
 
 # Function to check if the user is an admin
 def is_admin(username, password):
-    return username == ADMIN_USERNAME and verify_password(ADMIN_PASSWORD_HASH, password)
+    return username == ADMIN_USERNAME and verify_password(_globals().admin_hash, password)
 
-# Function to get all users
-def get_all_users():
-    connection = create_connection()
+# Function to get all users (cached; `version` is bumped on every insert/update/delete
+# so the cache is invalidated as soon as the table changes)
+@st.cache_data(ttl=60, show_spinner=False)
+def get_all_users(version):
+    connection = get_conn()
     if not connection:
-        return []
+        return pd.DataFrame()
     try:
         with connection.cursor() as cursor:
             sql = "SELECT * FROM users"
             cursor.execute(sql)
-            return cursor.fetchall()
+            return pd.DataFrame(cursor.fetchall())
     except pymysql.MySQLError as e:
         st.error(f"Database Error: {e}")
-        return []
+        return pd.DataFrame()
     finally:
-        connection.close()
+        release_conn(connection)
+
+# Bump the users table version so the next get_all_users() call refetches
+def bump_users_version():
+    st.session_state.users_version = st.session_state.get('users_version', 0) + 1
 
 # Function to update user details
 def update_user(username, first_name, last_name, email, phone_number, password=None):
-    connection = create_connection()
+    connection = get_conn()
     if not connection:
         st.error("Unable to connect to the database.")
         return
@@ -162,15 +200,16 @@ def update_user(username, first_name, last_name, email, phone_number, password=N
                 values = (first_name, last_name, email, phone_number, username)
             cursor.execute(sql, values)
             connection.commit()
+            bump_users_version()
             st.success("User updated successfully!")
     except pymysql.MySQLError as e:
         st.error(f"Database Error: {e}")
     finally:
-        connection.close()
+        release_conn(connection)
 
 # Function to delete a user
 def delete_user(username):
-    connection = create_connection()
+    connection = get_conn()
     if not connection:
         st.error("Unable to connect to the database.")
         return
@@ -179,32 +218,90 @@ def delete_user(username):
             sql = "DELETE FROM users WHERE username = %s"
             cursor.execute(sql, (username,))
             connection.commit()
+            bump_users_version()
             st.success("User deleted successfully!")
     except pymysql.MySQLError as e:
         st.error(f"Database Error: {e}")
     finally:
-        connection.close()
+        release_conn(connection)
         
-# Function to detect encoding
-def detect_encoding(file):
-    raw_data = file.read(10000)  # Read the first 10,000 bytes to detect encoding
-    result = chardet.detect(raw_data)
-    encoding = result['encoding']
-    file.seek(0)  # Reset file pointer to the beginning
-    return encoding
-
-# Function to read file
+# Detect encoding from a byte sample: BOM and ASCII fast paths first,
+# chardet's slow Bayesian classifier only for genuinely ambiguous bytes
+def _detect_from_bytes(raw_data):
+    if raw_data.startswith(b'\x00\x00\xfe\xff') or raw_data.startswith(b'\xff\xfe\x00\x00'):
+        return 'utf-32'
+    if raw_data.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    if raw_data.startswith(b'\xff\xfe') or raw_data.startswith(b'\xfe\xff'):
+        return 'utf-16'
+    try:
+        raw_data.decode('ascii')
+        return 'ascii'
+    except UnicodeDecodeError:
+        pass
+    return chardet.detect(raw_data)['encoding'] or 'utf-8'
+
+# CSVs above this size go through pyarrow's multi-threaded parser
+_PYARROW_MIN_BYTES = 1_000_000
+
+# Maximum rows handed to Plotly; figure JSON grows with row count, not
+# with what the chart can visually resolve, so larger frames are sampled
+PLOT_MAX = 50_000
+
+# Parse CSV bytes, preferring the pyarrow engine for large files and
+# falling back to pandas' default C engine when pyarrow is missing or
+# trips over its stricter quoting rules
+def _read_csv(raw, encoding):
+    if len(raw) > _PYARROW_MIN_BYTES:
+        try:
+            return pd.read_csv(BytesIO(raw), encoding=encoding, engine='pyarrow')
+        except (ImportError, ValueError, pd.errors.ParserError):
+            pass
+    return pd.read_csv(BytesIO(raw), encoding=encoding)
+
+# Read an xlsx with the Rust-backed calamine engine (pandas >= 2.2,
+# needs python-calamine installed); fall back to openpyxl if missing
+def _read_excel(buffer):
+    try:
+        return pd.read_excel(buffer, engine='calamine')
+    except ImportError:
+        return pd.read_excel(buffer, engine='openpyxl')
+
+# Function to read file; dispatches on the file extension (handles .xls,
+# .xlsx and .csv) and goes through the cached bytes-keyed parser
 def read_file(file):
+    return _parse_file(file.getvalue(), file.name)
+
+# Shrink a freshly parsed DataFrame: downcast int64/float64 to the
+# narrowest dtype that preserves the values, and convert low-cardinality
+# object columns to category. Roughly halves memory and speeds up
+# .corr()/value_counts. Downstream dtype checks must use
+# pd.api.types.is_numeric_dtype rather than exact 'int64'/'float64' names.
+def _downcast(df):
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in df.select_dtypes(include='float').columns:
+        df[col] = pd.to_numeric(df[col], downcast='float')
+    for col in df.select_dtypes(include='object').columns:
+        if df[col].nunique() / max(len(df), 1) < 0.5:
+            df[col] = df[col].astype('category')
+    return df
+
+# Cached file parser keyed by the raw bytes, so widget interactions that
+# rerun the script do not re-detect encoding or re-parse the upload
+@st.cache_data(show_spinner=True, max_entries=4)
+def _parse_file(raw, name):
     try:
-        if file.type == "text/csv":
-            encoding = detect_encoding(file)
-            df = pd.read_csv(file, encoding=encoding)
-        elif file.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-            df = pd.read_excel(file, engine='openpyxl')
+        file_extension = os.path.splitext(name)[1].lower()
+        if file_extension == ".csv":
+            encoding = _detect_from_bytes(raw[:65536])
+            df = _read_csv(raw, encoding)
+        elif file_extension in (".xls", ".xlsx"):
+            df = _read_excel(BytesIO(raw))
         else:
-            st.error("Unsupported file type.")
+            st.error("Unsupported file type. Please upload a CSV or Excel file.")
             return None
-        return df
+        return _downcast(df)
     except pd.errors.ParserError:
         st.error("Error parsing the file. Please check the file format.")
         return None
@@ -212,6 +309,29 @@ def read_file(file):
         st.error(f"Error reading file: {e}")
         return None
 
+# Cached analysis helpers, keyed on the DataFrame, so toggling a sidebar
+# widget that has nothing to do with them does not recompute anything
+@st.cache_data(show_spinner=False)
+def _corr(df):
+    return df[df.select_dtypes(include='number').columns].corr()
+
+@st.cache_data(show_spinner=False)
+def _heatmap_fig(corr):
+    return px.imshow(corr,
+                     title='Heatmap of Correlation Matrix',
+                     color_continuous_scale='Viridis')
+
+@st.cache_data(show_spinner=False)
+def _describe(df):
+    return df.describe()
+
+@st.cache_data(show_spinner=False)
+def _value_counts_table(df):
+    # One wide table (top 50 values per column) rendered in a single
+    # st.dataframe call, instead of two frontend messages per column
+    counts = {col: df[col].value_counts().head(50) for col in df.columns}
+    return pd.concat(counts, axis=1)
+
 # Define session state for user login and page view
 if 'authenticated' not in st.session_state:
     st.session_state.authenticated = False
@@ -226,6 +346,9 @@ if 'page' not in st.session_state:
 if 'uploaded_file' not in st.session_state:
     st.session_state.uploaded_file = None
 
+if 'users_version' not in st.session_state:
+    st.session_state.users_version = 0
+
 # Navigation functions
 def go_to_register():
     st.session_state.page = 'register'
@@ -276,8 +399,6 @@ try:
                 st.error("Invalid email address.")
             elif not is_valid_phone(new_phone):
                 st.error("Invalid phone number.")
-            elif check_existing_user(new_username, new_email, new_phone):
-                st.error("Username, email, or phone number already in use.")
             else:
                 register_user(new_username, new_name, new_last_name, new_email, new_phone, new_password)
 
@@ -365,53 +486,29 @@ try:
 
         # Initialize df to None
         df = None
-        # Function to read file
-        def read_file(file):
-            try:
-                # Check the file extension
-                file_extension = os.path.splitext(file.name)[1].lower()
-                st.write(f"Uploaded file extension: {file_extension}")  # Debugging line
-                
-                if file_extension == ".csv":
-                    encoding = detect_encoding(file)
-                    df = pd.read_csv(file, encoding=encoding)
-                
-                elif file_extension in [".xls", ".xlsx"]:
-                    df = pd.read_excel(file, engine='openpyxl')  # Ensure you have 'openpyxl' installed
-                
-                else:
-                    st.error("Unsupported file type. Please upload a CSV or Excel file.")
-                    return None
-                
-                return df
-            
-            except pd.errors.ParserError:
-                st.error("Error parsing the file. Please check the file format.")
-                return None
-            except Exception as e:
-                st.error(f"Error reading file: {e}")
-                return None
-    
+
         # If a file is uploaded, read the data
         if uploaded_file:
-            st.session_state.uploaded_file = uploaded_file
-            df = read_file(uploaded_file)
+            raw = uploaded_file.getvalue()
+            # Keep only a small fingerprint in session_state; the parsed
+            # DataFrame itself lives in the _parse_file cache
+            st.session_state.uploaded_file = (uploaded_file.name,
+                                              uploaded_file.size,
+                                              hashlib.md5(raw).hexdigest())
+            df = _parse_file(raw, uploaded_file.name)
 
         if df is not None and not df.empty:
             st.write("### Data Preview", df.head())
 
-            # Proceed with data analysis
+            # Proceed with data analysis; column metadata is computed once
+            # per rerun and reused by every branch below
+            columns = df.columns.tolist()
             numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
-            
+            dtypes = df.dtypes.astype(str).to_dict()
+
             if len(numeric_columns) > 0:
-                # Calculate correlation matrix
-                correlation_matrix = df[numeric_columns].corr()
-                
-                # Generate heatmap
-                fig_heatmap = px.imshow(correlation_matrix, 
-                                        title='Heatmap of Correlation Matrix',
-                                        color_continuous_scale='Viridis')
-                st.plotly_chart(fig_heatmap)
+                # Correlation matrix and heatmap figure, both cached
+                st.plotly_chart(_heatmap_fig(_corr(df)))
             else:
                 st.error("No numeric columns found in the dataset to generate a heatmap.")
             
@@ -424,41 +521,48 @@ try:
             # Drop-down menu for selecting plot type
             plot_type = st.sidebar.selectbox("Select plot type", ["Bar Chart", "Line Chart", "Scatter Plot", "Pie Chart"])
 
-            # Drop-down menus for selecting columns
-            columns = df.columns.tolist()
-            
-
             if show_data_dimensions:
                 st.write(f"Data Dimensions: {df.shape}")
 
             if show_field_descriptions:
                 st.write("Field Descriptions:")
-                for col in df.columns:
-                    st.write(f"- **{col}**: {df[col].dtype}")
+                st.dataframe(pd.DataFrame({"column": columns,
+                                           "dtype": [dtypes[col] for col in columns]}))
 
             if show_summary_statistics:
                 st.write("Summary Statistics:")
-                st.write(df.describe())
+                st.write(_describe(df))
 
             if show_value_counts:
                 st.write("Value Counts of Fields:")
-                for col in df.columns:
-                    st.write(f"**{col}**:")
-                    st.write(df[col].value_counts())
+                st.dataframe(_value_counts_table(df))
             
             if len(columns) > 0:
                 x_col = st.sidebar.selectbox("Select X-axis column", columns)
                 y_col = st.sidebar.selectbox("Select Y-axis column", columns)
 
+                # Sample large frames before plotting (sort_index keeps the
+                # original row order, which the line chart depends on); bar
+                # and pie charts aggregate instead, so they keep exact totals
+                # without shipping raw rows that Plotly would bin anyway
+                plot_df = df if len(df) <= PLOT_MAX else df.sample(PLOT_MAX, random_state=0).sort_index()
+
                 if plot_type == "Bar Chart":
-                    fig = px.bar(df, x=x_col, y=y_col, title='Bar Chart')
+                    # Aggregating the same column onto itself would collide,
+                    # so that case plots the (sampled) raw rows instead
+                    if x_col != y_col and pd.api.types.is_numeric_dtype(df[y_col]):
+                        bar_df = df.groupby(x_col, as_index=False, observed=True)[y_col].sum()
+                        fig = px.bar(bar_df, x=x_col, y=y_col, title='Bar Chart')
+                    else:
+                        fig = px.bar(plot_df, x=x_col, y=y_col, title='Bar Chart')
                 elif plot_type == "Line Chart":
-                    fig = px.line(df, x=x_col, y=y_col, title='Line Chart')
+                    fig = px.line(plot_df, x=x_col, y=y_col, title='Line Chart')
                 elif plot_type == "Scatter Plot":
-                    fig = px.scatter(df, x=x_col, y=y_col, title='Scatter Plot')
+                    fig = px.scatter(plot_df, x=x_col, y=y_col, title='Scatter Plot')
                 elif plot_type == "Pie Chart":
-                    if df[x_col].dtype == 'object' and df[y_col].dtype in ['int64', 'float64']:
-                        fig = px.pie(df, names=x_col, values=y_col, title='Pie Chart')
+                    if not pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col]):
+                        pie_df = df.groupby(x_col, as_index=False, observed=True)[y_col].sum()
+                        fig = px.pie(pie_df, names=x_col, values=y_col, title='Pie Chart')
                     else:
                         st.error("Pie chart requires categorical. data for 'names' and numerical data for 'values'.")
                         fig = None
@@ -481,11 +585,11 @@ try:
 
         current_user = st.session_state.username
 
-        connection = create_connection()
+        connection = get_conn()
         if connection:
             try:
                 with connection.cursor() as cursor:
-                    sql = "SELECT * FROM users WHERE username = %s"
+                    sql = "SELECT first_name, last_name, email, phone_number FROM users WHERE username = %s LIMIT 1"
                     cursor.execute(sql, (current_user,))
                     user = cursor.fetchone()
                     if user:
@@ -501,13 +605,13 @@ try:
                             if password and password != confirm_password:
                                 st.error("Passwords do not match.")
                             else:
-                                update_user(current_user, first_name, last_name, email, phone, password)
+                                update_user(current_user, first_name, last_name, email, phone, password or None)
                     else:
                         st.error("USer not found.")
             except pymysql.MySQLError as e:
                 st.error(f"Database Error: {e}")
             finally:
-                connection.close()
+                release_conn(connection)
 
         st.button("Back to Dashboard", key='back_to_dashboard', on_click=go_to_main)
 
@@ -519,10 +623,9 @@ try:
         st.header("Admin Panel")
         
         # Display all users
-        users = get_all_users()
-        if users:
+        user_df = get_all_users(st.session_state.users_version)
+        if not user_df.empty:
             st.write("### User List")
-            user_df = pd.DataFrame(users)
             st.dataframe(user_df)
 
             # User selection for editing
@@ -541,7 +644,8 @@ try:
                 if new_password and new_password != confirm_password:
                     st.error("Passwords do not match.")
                 else:
-                    update_user(selected_username, first_name, last_name, email, phone, new_password)
+                    # Pass None when blank so update_user skips rehashing
+                    update_user(selected_username, first_name, last_name, email, phone, new_password or None)
 
             
             # Delete User button